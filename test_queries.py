@@ -7,6 +7,7 @@ Useful for generating demonstration evidence for assignment submission.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from chatbot import CourseNoteChatbot
 
@@ -43,10 +44,9 @@ def run_tests():
             groq_api_key=os.getenv("GROQ_API_KEY")
         )
         
-        # Load and build index
+        # Build the index (reuses the disk cache when notes are unchanged)
         print("Initializing chatbot...")
-        documents = chatbot.load_notes()
-        chatbot.build_index(documents)
+        chatbot.build_index()
         print()
         
     except Exception as e:
@@ -56,37 +56,39 @@ def run_tests():
     # Prepare results file
     results_file = f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     
-    # Run tests
-    results = []
-    successful = 0
-    failed = 0
-    
-    for i, query in enumerate(test_queries, 1):
-        print(f"\n{'='*70}")
-        print(f"Query {i}/{len(test_queries)}")
-        print(f"{'='*70}")
-        print(f"Question: {query}")
-        print("-"*70)
-        
+    # Run tests concurrently - each query blocks on Groq's HTTP latency,
+    # so wall time is roughly the slowest query instead of the sum
+    def run_query(query):
         try:
-            response = chatbot.ask(query)
-            print(f"Response: {response}")
-            
-            results.append({
+            return {
                 'query': query,
-                'response': response,
+                'response': chatbot.ask(query),
                 'status': 'success'
-            })
-            successful += 1
-            
+            }
         except Exception as e:
-            print(f"❌ Error: {e}")
-            results.append({
+            return {
                 'query': query,
                 'response': str(e),
                 'status': 'failed'
-            })
-            failed += 1
+            }
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(run_query, test_queries))
+
+    successful = sum(1 for r in results if r['status'] == 'success')
+    failed = len(results) - successful
+
+    for i, result in enumerate(results, 1):
+        print(f"\n{'='*70}")
+        print(f"Query {i}/{len(test_queries)}")
+        print(f"{'='*70}")
+        print(f"Question: {result['query']}")
+        print("-"*70)
+
+        if result['status'] == 'success':
+            print(f"Response: {result['response']}")
+        else:
+            print(f"❌ Error: {result['response']}")
     
     # Save results to file
     print(f"\n\n{'='*70}")